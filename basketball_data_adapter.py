@@ -3,6 +3,45 @@ Basketball Data Adapter
 Transforms database records into format expected by basketball valuation models
 """
 
+import numpy as np
+import pandas as pd
+
+from database.models_basketball import BasketballPlayer, BasketballPerformanceStat, BasketballTeam
+
+# Per-game average -> season total it is derived from
+PER_GAME_STATS = {
+    'ppg': 'pts',
+    'rpg': 'reb',
+    'apg': 'ast',
+    'spg': 'stl',
+    'bpg': 'blk',
+    'topg': 'tov',
+    'mpg': 'minutes',
+}
+
+# Stat column -> default used when the database value is missing (or zero)
+STAT_DEFAULTS = {
+    'pts': 0, 'reb': 0, 'oreb': 0, 'dreb': 0, 'ast': 0,
+    'stl': 0, 'blk': 0, 'tov': 0, 'pf': 0,
+    'fg_pct': 0, 'tp_pct': 0, 'ft_pct': 0,
+    'fgm': 0, 'fga': 0, 'tpm': 0, 'tpa': 0, 'ftm': 0, 'fta': 0,
+    'per': 15.0, 'usage_rate': 20.0, 'ortg': 100.0, 'drtg': 105.0,
+    'ws': 0, 'bpm': 0,
+}
+
+# Season counting stats are whole numbers; everything else is a rate or metric.
+# int32 rather than int16 so downstream `count * constant` math cannot overflow.
+COUNT_STATS = [
+    'games', 'pts', 'reb', 'oreb', 'dreb', 'ast', 'stl', 'blk', 'tov', 'pf',
+    'fgm', 'fga', 'tpm', 'tpa', 'ftm', 'fta',
+]
+BULK_DTYPES = {
+    **{name: np.float32 for name in STAT_DEFAULTS},
+    'minutes': np.float32,
+    **{name: np.int32 for name in COUNT_STATS},
+}
+
+
 def adapt_basketball_player_to_valuation_format(player, stat_record, team):
     """
     Transform basketball player and stats from database to valuation format
@@ -69,6 +108,70 @@ def adapt_basketball_player_to_valuation_format(player, stat_record, team):
     }
 
 
+def adapt_basketball_players_bulk(session, season: int = None) -> pd.DataFrame:
+    """
+    Load every player-season in valuation format as a single DataFrame
+    
+    Columnar counterpart of adapt_basketball_player_to_valuation_format:
+    one JOINed query of plain columns, no per-player dicts or ORM objects.
+    
+    Args:
+        session: Database session
+        season: Only load this season (all seasons if None)
+    
+    Returns:
+        DataFrame with one row per player-season, same columns and defaults
+        as adapt_basketball_player_to_valuation_format. Counting stats are
+        int32 and rates/advanced metrics are float32 (see BULK_DTYPES), so
+        consumers must accept float32 input.
+    """
+    stat_columns = [getattr(BasketballPerformanceStat, name).label(name) for name in STAT_DEFAULTS]
+    
+    query = session.query(
+        BasketballPlayer.name.label('name'),
+        BasketballTeam.school.label('team'),
+        BasketballPlayer.position.label('position'),
+        BasketballTeam.conference.label('conference'),
+        BasketballPerformanceStat.season.label('season'),
+        BasketballPerformanceStat.games_played.label('games'),
+        BasketballPerformanceStat.minutes.label('minutes'),
+        *stat_columns,
+        BasketballPlayer.id.label('player_id'),
+        BasketballTeam.id.label('team_id'),
+    ).join(
+        BasketballPerformanceStat,
+        BasketballPlayer.id == BasketballPerformanceStat.player_id
+    ).outerjoin(
+        BasketballTeam,
+        BasketballPlayer.team_id == BasketballTeam.id
+    )
+    
+    if season is not None:
+        query = query.filter(BasketballPerformanceStat.season == season)
+    
+    rows = query.all()
+    players_df = pd.DataFrame.from_records(
+        rows, columns=[col['name'] for col in query.column_descriptions]
+    )
+    
+    # Same fallbacks as the per-player adapter's `or` defaults
+    players_df['team'] = players_df['team'].fillna('Unknown')
+    players_df['conference'] = players_df['conference'].fillna('')
+    players_df['position'] = players_df['position'].fillna('SF').replace('', 'SF')
+    players_df['games'] = players_df['games'].fillna(0)
+    players_df['minutes'] = players_df['minutes'].fillna(0)
+    for column, default in STAT_DEFAULTS.items():
+        values = players_df[column].fillna(default)
+        if default:
+            values = values.mask(values == 0, default)
+        players_df[column] = values
+    
+    # Narrow numeric columns to halve the memory the valuation math streams through
+    for column in COUNT_STATS:
+        players_df[column] = players_df[column].round()
+    return players_df.astype(BULK_DTYPES)
+
+
 def calculate_per_game_stats(player_data: dict) -> dict:
     """
     Add per-game averages to player data
@@ -85,13 +188,8 @@ def calculate_per_game_stats(player_data: dict) -> dict:
         return player_data
     
     # Add per-game stats
-    player_data['ppg'] = round(player_data.get('pts', 0) / games, 1)
-    player_data['rpg'] = round(player_data.get('reb', 0) / games, 1)
-    player_data['apg'] = round(player_data.get('ast', 0) / games, 1)
-    player_data['spg'] = round(player_data.get('stl', 0) / games, 1)
-    player_data['bpg'] = round(player_data.get('blk', 0) / games, 1)
-    player_data['topg'] = round(player_data.get('tov', 0) / games, 1)
-    player_data['mpg'] = round(player_data.get('minutes', 0) / games, 1)
+    for per_game, total in PER_GAME_STATS.items():
+        player_data[per_game] = round(player_data.get(total, 0) / games, 1)
     
     # Assist-to-turnover ratio
     tov = player_data.get('tov', 0)
@@ -102,3 +200,29 @@ def calculate_per_game_stats(player_data: dict) -> dict:
     
     return player_data
 
+
+def calculate_per_game_stats_batch(players_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add per-game averages to a DataFrame of players in one vectorized pass
+    
+    Args:
+        players_df: DataFrame with the season-total columns produced by
+            adapt_basketball_player_to_valuation_format
+    
+    Returns:
+        The same DataFrame with per-game columns added. Players with no
+        games get NaN per-game stats.
+    """
+    games = players_df['games'].replace(0, np.nan)
+    
+    per_game = players_df[list(PER_GAME_STATS.values())].div(games, axis=0).round(1)
+    players_df[list(PER_GAME_STATS)] = per_game.to_numpy()
+    
+    # Assist-to-turnover ratio (inf for assists without turnovers)
+    ast = players_df['ast'].to_numpy(dtype=float)
+    tov = players_df['tov'].to_numpy(dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratio = np.where(tov > 0, np.round(ast / tov, 2), np.where(ast > 0, np.inf, 0.0))
+    players_df['ast_tov_ratio'] = np.where(games.notna(), ratio, np.nan)
+    
+    return players_df
@@ -5,21 +5,49 @@ For both Football and Basketball to enable predictive model training
 
 import sys
 from pathlib import Path
-import yaml
 import argparse
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select
 
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from scrapers.cfb_api_client import CollegeFootballDataAPI
 from scrapers.cbb_api_client import CollegeBasketballDataAPI
+from config import get_config
 from database import get_session
 from database.models import Team, Player, PerformanceStat
 from database.models_basketball import BasketballTeam, BasketballPlayer, BasketballPerformanceStat
 from etl.data_pipeline import DataPipeline
+from etl.transformers import transform_basketball_stat_data
 from basketball_data_adapter import adapt_basketball_player_to_valuation_format
 
+# Rows per executemany() when bulk inserting basketball stats
+INSERT_BATCH_SIZE = 1000
+
+# Seasons fetched from the API concurrently (requests still share the client's rate limit)
+FETCH_WORKERS = 4
+
+# Football teams collected per season with --test
+TEST_TEAM_LIMIT = 2
+
+# Core INSERT reused for every stat batch (skips ORM object construction)
+stat_insert = BasketballPerformanceStat.__table__.insert()
+
+
+def load_basketball_team_ids(session):
+    """Basketball team ids by school"""
+    return {
+        school: team_id
+        for team_id, school in session.execute(select(BasketballTeam.id, BasketballTeam.school))
+    }
+
+
+def fetch_basketball_season(bb_api, year):
+    """Teams and player stats for one season (API only, no database access)"""
+    return bb_api.get_teams(year=year), bb_api.get_player_season_stats(year)
+
+
 print("="*80)
 print("HISTORICAL DATA COLLECTION (2015-2024)")
 print("="*80)
@@ -34,21 +62,24 @@ parser.add_argument('--start-year', type=int, default=2015,
 parser.add_argument('--end-year', type=int, default=2024,
                     help='Ending year (default: 2024)')
 parser.add_argument('--test', action='store_true',
-                    help='Test mode: only collect 1 team per season')
+                    help=f'Test mode: only collect {TEST_TEAM_LIMIT} teams per season')
+parser.add_argument('--test-years', type=int, default=1,
+                    help='Seasons to collect in test mode (default: 1)')
 args = parser.parse_args()
 
 # Load config
-with open('config/config.yaml', 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+config = get_config()
 
 # Determine years to collect
 years = list(range(args.start_year, args.end_year + 1))
+if args.test:
+    years = years[:args.test_years]
 print(f"Collecting seasons: {years[0]} through {years[-1]}")
 print(f"Sport(s): {args.sport}")
 print(f"Test mode: {args.test}")
 print()
 
-session = get_session()
+session = get_session(expire_on_commit=False)
 
 # ============================================================================
 # FOOTBALL COLLECTION
@@ -60,12 +91,18 @@ if args.sport in ['football', 'both']:
     print("="*80)
     print()
     
-    fb_api_key = config.get('collegefootballdata', {}).get('api_key', '')
+    fb_api_key = config.cfb_api_key
     if not fb_api_key:
         print("[ERROR] No football API key")
     else:
-        api = CollegeFootballDataAPI(fb_api_key)
-        pipeline = DataPipeline(session, api)
+        pipeline = DataPipeline()
+        team_limit = TEST_TEAM_LIMIT if args.test else None
+        
+        # Teams are not per-season, so fetch them once (only a few in test mode)
+        print(f"Collecting teams{f' (TEST: {team_limit} teams)' if args.test else ''}...")
+        teams_count = pipeline.collect_teams(limit=team_limit)
+        print(f"✓ {teams_count} teams")
+        team_names = list(session.scalars(select(Team.name).order_by(Team.id).limit(team_limit)))
         
         for year in years:
             print(f"\n{'='*60}")
@@ -73,26 +110,20 @@ if args.sport in ['football', 'both']:
             print(f"{'='*60}\n")
             
             try:
-                # Collect teams
-                print(f"[{year}] Collecting teams...")
-                teams_count = pipeline.collect_and_save_teams(year)
-                print(f"[{year}] ✓ {teams_count} teams")
-                
-                # Collect rosters (limited if test mode)
-                team_limit = 2 if args.test else None
-                print(f"[{year}] Collecting rosters{' (TEST: 2 teams)' if args.test else ''}...")
-                players_count = pipeline.collect_and_save_rosters(year, team_limit=team_limit)
+                # Collect rosters
+                print(f"[{year}] Collecting rosters...")
+                players_count = sum(pipeline.collect_roster(team_name, year) for team_name in team_names)
                 print(f"[{year}] ✓ {players_count} players")
                 
-                # Collect stats
+                # Collect stats (matched to the players already collected)
                 print(f"[{year}] Collecting player stats...")
-                stats_count = pipeline.collect_and_save_player_stats(year)
+                stats_count = pipeline.collect_player_stats(year)
                 print(f"[{year}] ✓ {stats_count} stats")
                 
-                # Collect transfers (if year >= 2021, when portal opened)
-                if year >= 2021:
+                # Collect transfers (if year >= 2021, when portal opened); not needed for a test run
+                if year >= 2021 and not args.test:
                     print(f"[{year}] Collecting transfers...")
-                    transfers_count = pipeline.collect_and_save_transfers(year)
+                    transfers_count = pipeline.collect_transfers(year)
                     print(f"[{year}] ✓ {transfers_count} transfers")
                 
                 print(f"[{year}] ✅ Football season complete!")
@@ -100,6 +131,8 @@ if args.sport in ['football', 'both']:
             except Exception as e:
                 print(f"[{year}] ❌ Error: {e}")
                 continue
+        
+        pipeline.close()
 
 # ============================================================================
 # BASKETBALL COLLECTION
@@ -111,12 +144,19 @@ if args.sport in ['basketball', 'both']:
     print("="*80)
     print()
     
-    bb_api_key = config.get('collegebasketballdata', {}).get('api_key', '')
+    bb_api_key = config.cbb_api_key
     if not bb_api_key:
         print("[ERROR] No basketball API key")
     else:
         bb_api = CollegeBasketballDataAPI(bb_api_key)
         
+        # Team ids, loaded once and kept current as teams are added
+        teams_by_name = load_basketball_team_ids(session)
+        
+        # Fetch seasons in the background; the database is written from this thread only
+        fetch_pool = ThreadPoolExecutor(max_workers=FETCH_WORKERS)
+        season_fetches = {year: fetch_pool.submit(fetch_basketball_season, bb_api, year) for year in years}
+        
         for year in years:
             print(f"\n{'='*60}")
             print(f"BASKETBALL: {year} SEASON")
@@ -125,23 +165,23 @@ if args.sport in ['basketball', 'both']:
             try:
                 # Collect teams
                 print(f"[{year}] Collecting teams...")
-                teams_data = bb_api.get_teams(year=year)
+                teams_data, stats_data = season_fetches.pop(year).result()
                 
                 teams_added = 0
                 for team_data in teams_data:
-                    team_id = team_data.get('id')
-                    if not team_id:
+                    school = team_data.get('school')
+                    if not team_data.get('id') or not school:
                         continue
                     
-                    existing = session.query(BasketballTeam).filter_by(source_id=team_id).first()
-                    if not existing:
+                    if school not in teams_by_name:
                         new_team = BasketballTeam(
-                            source_id=team_id,
-                            school=team_data.get('school'),
+                            school=school,
                             mascot=team_data.get('mascot'),
                             conference=team_data.get('conference'),
                         )
                         session.add(new_team)
+                        session.flush()
+                        teams_by_name[school] = new_team.id
                         teams_added += 1
                 
                 session.commit()
@@ -149,11 +189,19 @@ if args.sport in ['basketball', 'both']:
                 
                 # Collect stats
                 print(f"[{year}] Collecting player stats...")
-                stats_data = bb_api.get_player_season_stats(year)
                 
-                stats_added = 0
-                players_added = 0
+                # Players already stored for this season, keyed by (team_id, name)
+                season_players = select(
+                    BasketballPlayer.id, BasketballPlayer.team_id, BasketballPlayer.name
+                ).where(BasketballPlayer.season == year)
+                player_ids = {
+                    (team_id, name): player_id
+                    for player_id, team_id, name in session.execute(season_players)
+                }
                 
+                # Pass 1: resolve teams and collect players we have not seen yet
+                records = []
+                new_players = {}
                 for stat_record in stats_data:
                     player_name = stat_record.get('name')
                     team_name = stat_record.get('team')
@@ -162,76 +210,54 @@ if args.sport in ['basketball', 'both']:
                         continue
                     
                     # Find team
-                    team = session.query(BasketballTeam).filter_by(school=team_name).first()
-                    if not team:
+                    team_id = teams_by_name.get(team_name)
+                    if not team_id:
                         continue
                     
-                    # Find or create player
-                    player = session.query(BasketballPlayer).filter_by(
-                        team_id=team.id,
-                        name=player_name,
-                        season=year
-                    ).first()
-                    
-                    if not player:
-                        player = BasketballPlayer(
-                            team_id=team.id,
-                            name=player_name,
-                            position=stat_record.get('position', 'G'),
-                            season=year
-                        )
-                        session.add(player)
-                        session.flush()
-                        players_added += 1
-                    
-                    # Add stats
-                    existing_stat = session.query(BasketballPerformanceStat).filter_by(
-                        player_id=player.id,
-                        season=year
-                    ).first()
-                    
-                    if not existing_stat:
-                        field_goals = stat_record.get('fieldGoals', {}) or {}
-                        three_pts = stat_record.get('threePointFieldGoals', {}) or {}
-                        free_throws = stat_record.get('freeThrows', {}) or {}
-                        rebounds = stat_record.get('rebounds', {}) or {}
-                        win_shares = stat_record.get('winShares', {}) or {}
-                        
-                        new_stat = BasketballPerformanceStat(
-                            player_id=player.id,
-                            season=year,
-                            games_played=stat_record.get('games', 0),
-                            games_started=stat_record.get('starts', 0),
-                            minutes=float(stat_record.get('minutes') or 0.0),
-                            pts=float(stat_record.get('points') or 0.0),
-                            reb=float(rebounds.get('total', 0.0)) if isinstance(rebounds, dict) else 0.0,
-                            ast=float(stat_record.get('assists', 0.0)) if stat_record.get('assists') else 0.0,
-                            stl=float(stat_record.get('steals', 0.0)) if stat_record.get('steals') else 0.0,
-                            blk=float(stat_record.get('blocks', 0.0)) if stat_record.get('blocks') else 0.0,
-                            tov=float(stat_record.get('turnovers', 0.0)) if stat_record.get('turnovers') else 0.0,
-                            pf=float(stat_record.get('fouls', 0.0)) if stat_record.get('fouls') else 0.0,
-                            fgm=float(field_goals.get('made', 0.0)) if isinstance(field_goals, dict) else 0.0,
-                            fga=float(field_goals.get('attempted', 0.0)) if isinstance(field_goals, dict) else 0.0,
-                            fg_pct=float(field_goals.get('pct', 0.0)) if isinstance(field_goals, dict) else 0.0,
-                            tpm=float(three_pts.get('made', 0.0)) if isinstance(three_pts, dict) else 0.0,
-                            tpa=float(three_pts.get('attempted', 0.0)) if isinstance(three_pts, dict) else 0.0,
-                            tp_pct=float(three_pts.get('pct', 0.0)) if isinstance(three_pts, dict) else 0.0,
-                            ftm=float(free_throws.get('made', 0.0)) if isinstance(free_throws, dict) else 0.0,
-                            fta=float(free_throws.get('attempted', 0.0)) if isinstance(free_throws, dict) else 0.0,
-                            ft_pct=float(free_throws.get('pct', 0.0)) if isinstance(free_throws, dict) else 0.0,
-                            per=float(stat_record.get('per', 0.0)) if stat_record.get('per') else None,
-                            usage_rate=float(stat_record.get('usage', 0.0)) if stat_record.get('usage') else 0.0,
-                            ortg=float(stat_record.get('offensiveRating', 0.0)) if stat_record.get('offensiveRating') else None,
-                            drtg=float(stat_record.get('defensiveRating', 0.0)) if stat_record.get('defensiveRating') else None,
-                            ws=float(win_shares.get('total', 0.0)) if isinstance(win_shares, dict) else None,
-                        )
-                        session.add(new_stat)
-                        stats_added += 1
+                    key = (team_id, player_name)
+                    if key not in player_ids and key not in new_players:
+                        new_players[key] = {
+                            'team_id': team_id,
+                            'name': player_name,
+                            'position': stat_record.get('position', 'G'),
+                            'season': year,
+                        }
+                    records.append((key, stat_record))
+                
+                # Bulk insert new players, then read back their ids in one SELECT
+                players_added = len(new_players)
+                if new_players:
+                    session.bulk_insert_mappings(BasketballPlayer, list(new_players.values()))
+                    player_ids.update(
+                        ((team_id, name), player_id)
+                        for player_id, team_id, name in session.execute(season_players)
+                    )
+                
+                # Pass 2: bulk insert stats for players without a stat row this season
+                existing_stats = set(session.scalars(
+                    select(BasketballPerformanceStat.player_id)
+                    .where(BasketballPerformanceStat.season == year)
+                ))
+                
+                stats_added = 0
+                batch = []
+                for key, stat_record in records:
+                    player_id = player_ids[key]
+                    if player_id in existing_stats:
+                        continue
+                    existing_stats.add(player_id)
                     
-                    # Commit every 100
-                    if (stats_added + players_added) % 100 == 0:
-                        session.commit()
+                    batch.append(transform_basketball_stat_data(stat_record, player_id, year))
+                    if len(batch) >= INSERT_BATCH_SIZE:
+                        session.execute(stat_insert, batch)
+                        stats_added += len(batch)
+                        batch.clear()
+                
+                if batch:
+                    session.execute(stat_insert, batch)
+                    stats_added += len(batch)
                 
+                # One commit per season; any error above rolls back the whole season
                 session.commit()
                 print(f"[{year}] ✓ {players_added} players, {stats_added} stats")
                 print(f"[{year}] ✅ Basketball season complete!")
@@ -239,7 +265,12 @@ if args.sport in ['basketball', 'both']:
             except Exception as e:
                 print(f"[{year}] ❌ Error: {e}")
                 session.rollback()
+                
+                # Drop any rolled-back teams from the cache
+                teams_by_name = load_basketball_team_ids(session)
                 continue
+        
+        fetch_pool.shutdown()
 
 session.close()
 
@@ -10,9 +10,10 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from scrapers.cbb_api_client import CollegeBasketballDataAPI
+from config import get_config
 from database import get_session
 from database.models_basketball import BasketballTeam, BasketballPlayer
-import yaml
+from sqlalchemy import select, update
 
 print("="*80)
 print("BASKETBALL DATA COLLECTION")
@@ -20,10 +21,9 @@ print("="*80)
 print()
 
 # Load config
-with open('config/config.yaml', 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+config = get_config()
 
-api_key = config.get('collegebasketballdata', {}).get('api_key', '')
+api_key = config.cbb_api_key
 
 if not api_key:
     print("[ERROR] No basketball API key in config")
@@ -71,15 +71,11 @@ print("="*80)
 
 try:
     # Import Base and engine
-    from sqlalchemy import create_engine
-    from database.models import Base
+    from database import Base, get_engine, create_missing_indexes
     from database.models_basketball import BasketballTeam, BasketballPlayer, BasketballPerformanceStat, BasketballTransfer
     
-    # Get engine
-    with open('config/config.yaml', 'r', encoding='utf-8') as f:
-        db_config = yaml.safe_load(f)
-    db_path = db_config.get('database', {}).get('sqlite', {}).get('path', 'database/cav_data.db')
-    engine = create_engine(f'sqlite:///{db_path}')
+    # Shared engine (same pool and pragmas as get_session())
+    engine = get_engine()
     
     print("\nCreating basketball tables...")
     Base.metadata.create_all(engine, tables=[
@@ -88,6 +84,7 @@ try:
         BasketballPerformanceStat.__table__,
         BasketballTransfer.__table__
     ])
+    create_missing_indexes(engine)
     print("[OK] Basketball tables created")
     
 except Exception as e:
@@ -102,47 +99,47 @@ print("SAVING TEAMS TO DATABASE")
 print("="*80)
 
 session = get_session()
-teams_added = 0
-teams_updated = 0
 
+# Existing teams by school, loaded once
+existing_ids = {
+    school: team_id
+    for team_id, school in session.execute(select(BasketballTeam.id, BasketballTeam.school))
+}
+
+new_rows = {}
+update_rows = []
 for team_data in teams:
-    try:
-        school = team_data.get('school', team_data.get('team'))
-        if not school:
-            continue
-        
-        # Check if team exists
-        existing = session.query(BasketballTeam).filter_by(school=school).first()
-        
-        if existing:
-            # Update
-            existing.conference = team_data.get('conference')
-            existing.mascot = team_data.get('mascot')
-            existing.abbreviation = team_data.get('abbreviation')
-            teams_updated += 1
-        else:
-            # Create new
-            team = BasketballTeam(
-                school=school,
-                conference=team_data.get('conference'),
-                division='D1',  # Assuming D1 for now
-                mascot=team_data.get('mascot'),
-                abbreviation=team_data.get('abbreviation')
-            )
-            session.add(team)
-            teams_added += 1
-        
-        if (teams_added + teams_updated) % 50 == 0:
-            session.commit()
-            print(f"  Progress: {teams_added} added, {teams_updated} updated...")
-    
-    except Exception as e:
-        print(f"  [WARNING] Failed to save {school}: {e}")
-        session.rollback()
+    school = team_data.get('school', team_data.get('team'))
+    if not school:
         continue
+    
+    row = {
+        'conference': team_data.get('conference'),
+        'mascot': team_data.get('mascot'),
+        'abbreviation': team_data.get('abbreviation'),
+    }
+    if school in existing_ids:
+        row['id'] = existing_ids[school]
+        update_rows.append(row)
+    elif school not in new_rows:
+        row['school'] = school
+        row['division'] = 'D1'  # Assuming D1 for now
+        new_rows[school] = row
+
+try:
+    if new_rows:
+        session.bulk_insert_mappings(BasketballTeam, list(new_rows.values()))
+    if update_rows:
+        # Bulk UPDATE by primary key
+        session.execute(update(BasketballTeam), update_rows)
+    session.commit()
+except Exception as e:
+    print(f"  [ERROR] Failed to save teams: {e}")
+    session.rollback()
+    sys.exit(1)
 
-# Final commit
-session.commit()
+teams_added = len(new_rows)
+teams_updated = len(update_rows)
 
 print(f"\n[SUCCESS] Teams saved:")
 print(f"  Added: {teams_added}")
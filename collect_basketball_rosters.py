@@ -5,13 +5,13 @@ Collect player rosters for all basketball teams
 
 import sys
 from pathlib import Path
-import yaml
 import argparse
 
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from scrapers.cbb_api_client import CollegeBasketballDataAPI
+from config import get_config
 from etl.basketball_pipeline import BasketballDataPipeline
 
 print("="*80)
@@ -26,10 +26,9 @@ parser.add_argument('--limit', type=int, help='Limit number of teams (for testin
 args = parser.parse_args()
 
 # Load config
-with open('config/config.yaml', 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
+config = get_config()
 
-api_key = config.get('collegebasketballdata', {}).get('api_key', '')
+api_key = config.cbb_api_key
 
 if not api_key:
     print("[ERROR] No basketball API key in config")
@@ -5,226 +5,375 @@ Comprehensive data collection for multiple seasons
 
 import sys
 from pathlib import Path
-import yaml
 import argparse
 from datetime import datetime
+from queue import Queue, Full
+from threading import Thread, Event
+from sqlalchemy import select, insert
+from sqlalchemy.exc import SQLAlchemyError
 
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 from scrapers.cbb_api_client import CollegeBasketballDataAPI
+from config import get_config
 from database import get_session
 from database.models_basketball import BasketballTeam, BasketballPlayer, BasketballPerformanceStat
+from etl.transformers import transform_basketball_stat_data
+from etl.basketball_pipeline import build_stat_upsert, ensure_stat_upsert_index
 
-print("="*80)
-print("BASKETBALL DATA COLLECTION")
-print("="*80)
-print()
-
-# Parse arguments
-parser = argparse.ArgumentParser(description='Collect basketball player statistics')
-parser.add_argument('--season', type=int, nargs='+', default=[2023], 
-                    help='Season years to collect (e.g., --season 2023 2022 2021)')
-parser.add_argument('--all', action='store_true',
-                    help='Collect last 3 seasons (2023, 2022, 2021)')
-args = parser.parse_args()
-
-# Determine seasons to collect
-if args.all:
-    seasons = [2023, 2022, 2021]
-else:
-    seasons = args.season
-
-print(f"Collecting data for seasons: {', '.join(map(str, seasons))}")
-print()
-
-# Load config
-with open('config/config.yaml', 'r', encoding='utf-8') as f:
-    config = yaml.safe_load(f)
-
-api_key = config.get('collegebasketballdata', {}).get('api_key', '')
-
-if not api_key:
-    print("[ERROR] No basketball API key in config")
-    sys.exit(1)
-
-# Create API client
-api = CollegeBasketballDataAPI(api_key=api_key)
-session = get_session()
-
-# Statistics tracking
-total_stats_added = 0
-total_stats_updated = 0
-total_players_created = 0
-
-# Process each season
-for season in seasons:
+# Rows per executemany() when inserting players and upserting stats
+INSERT_BATCH_SIZE = 5000
+
+# Records between progress lines
+PROGRESS_EVERY = 1000
+
+# Records collect_seasons() may fetch ahead of the writer
+PREFETCH_RECORDS = 2000
+
+# Queue marker closing a season's records in collect_seasons()
+SEASON_END = object()
+
+
+def load_team_ids(session):
+    """Team ids by school"""
+    return {
+        school: team_id
+        for team_id, school in session.execute(select(BasketballTeam.id, BasketballTeam.school))
+    }
+
+
+def load_player_ids(session, season):
+    """Player ids for a season by (team_id, name)"""
+    return {
+        (team_id, name): player_id
+        for player_id, team_id, name in session.execute(
+            select(BasketballPlayer.id, BasketballPlayer.team_id, BasketballPlayer.name)
+            .where(BasketballPlayer.season == season)
+        )
+    }
+
+
+def write_stat_batch(session, stat_upsert, pending_stats, new_players, players_by_key):
+    """
+    Bulk insert a batch's new players, then upsert its stat rows
+
+    Args:
+        session: Database session
+        stat_upsert: Statement from build_stat_upsert()
+        pending_stats: Stat rows by player key; rows get their player_id here
+        new_players: Player rows to insert, by (team_id, name)
+        players_by_key: Player id cache, updated with the inserted players
+    """
+    if new_players:
+        inserted = session.execute(
+            insert(BasketballPlayer).returning(
+                BasketballPlayer.id, BasketballPlayer.team_id, BasketballPlayer.name
+            ),
+            list(new_players.values())
+        )
+        players_by_key.update(((team_id, name), player_id) for player_id, team_id, name in inserted)
+
+    for key, stat_row in pending_stats.items():
+        stat_row['player_id'] = players_by_key[key]
+    session.execute(stat_upsert, list(pending_stats.values()))
+
+
+def collect_season(season, api, session, stats_data=None):
+    """
+    Collect and save player stats for one season in a single transaction
+
+    Args:
+        season: Season year
+        api: CollegeBasketballDataAPI client
+        session: Database session (committed on success, rolled back on error)
+        stats_data: Already-fetched stat records; streamed from the API if omitted
+
+    Returns:
+        Summary dictionary, or None if the season had no data or was rolled back
+    """
     print("="*80)
     print(f"COLLECTING {season} SEASON")
     print("="*80)
     print()
-    
-    # Get all player stats for the season
-    print(f"Fetching player stats from API...")
-    stats_data = api.get_player_season_stats(season)
-    
-    if not stats_data:
-        print(f"[WARNING] No stats data for {season} season")
-        continue
-    
-    print(f"Retrieved {len(stats_data)} player stat records")
-    print()
-    
+
+    if stats_data is None:
+        # Stream player stats for the season page by page
+        print(f"Fetching player stats from API...")
+        stats_data = api.iter_player_season_stats(season)
+        print()
+
     stats_added = 0
     stats_updated = 0
     stats_failed = 0
     players_created = 0
-    
-    # Process each player's stats
-    for i, stat_record in enumerate(stats_data, 1):
-        try:
-            # Extract player info
-            player_name = stat_record.get('name')
-            team_name = stat_record.get('team')
-            position = stat_record.get('position', 'Unknown')
-            
-            if not player_name or not team_name:
+
+    stat_upsert = build_stat_upsert(session.get_bind().dialect.name)
+    teams_by_name = load_team_ids(session)
+    players_by_key = load_player_ids(session, season)
+
+    # Players with a stat row already stored this season (for reporting only)
+    existing_stats = set(session.scalars(
+        select(BasketballPerformanceStat.player_id)
+        .where(BasketballPerformanceStat.season == season)
+    ))
+    # Stat rows by player key; the API can repeat a player, and one multi-row
+    # ON CONFLICT statement may not touch the same row twice (PostgreSQL), so
+    # a batch keeps only the last record per player
+    pending_stats = {}
+    new_players = {}
+
+    # Players already counted this season, so repeats are not counted twice
+    queued_players = set()
+    i = 0
+
+    # Process each player's stats in a single transaction per season
+    try:
+        for i, stat_record in enumerate(stats_data, 1):
+            try:
+                # Extract player info
+                player_name = stat_record.get('name')
+                team_name = stat_record.get('team')
+                position = stat_record.get('position', 'Unknown')
+
+                if not player_name or not team_name:
+                    stats_failed += 1
+                    continue
+
+                # Find the team
+                team_id = teams_by_name.get(team_name)
+                if not team_id:
+                    # Create team if it doesn't exist
+                    team = BasketballTeam(
+                        school=team_name,
+                        conference=stat_record.get('conference')
+                    )
+                    session.add(team)
+                    session.flush()
+                    team_id = teams_by_name[team_name] = team.id
+
+                # Prepare stat data - using correct field names from model;
+                # player_id is filled in when the batch is written
+                stat_row = transform_basketball_stat_data(stat_record, None, season)
+
+                # Queue new players for a bulk insert with the batch
+                key = (team_id, player_name)
+                player_id = players_by_key.get(key)
+                if not player_id and key not in new_players:
+                    new_players[key] = {
+                        'team_id': team_id,
+                        'name': player_name,
+                        'position': position,
+                        'season': season,
+                    }
+                    players_created += 1
+
+                pending_stats[key] = stat_row
+                if key not in queued_players:
+                    queued_players.add(key)
+                    if player_id in existing_stats:
+                        stats_updated += 1
+                    else:
+                        stats_added += 1
+
+                # Insert new rows and update existing ones in one statement per batch
+                if len(pending_stats) >= INSERT_BATCH_SIZE:
+                    write_stat_batch(session, stat_upsert, pending_stats, new_players, players_by_key)
+                    pending_stats.clear()
+                    new_players.clear()
+
+                if i % PROGRESS_EVERY == 0:
+                    print(f"  Progress: {i} records - {stats_added} added, {stats_updated} updated, {players_created} new players...")
+
+            except (TypeError, ValueError) as e:
+                print(f"  [WARNING] Failed to process {player_name if 'player_name' in locals() else 'player'}: {e}")
                 stats_failed += 1
                 continue
-            
-            # Find the team
-            team = session.query(BasketballTeam).filter_by(school=team_name).first()
-            if not team:
-                # Create team if it doesn't exist
-                team = BasketballTeam(
-                    school=team_name,
-                    conference=stat_record.get('conference')
-                )
-                session.add(team)
-                session.flush()
-            
-            # Find or create player
-            player = session.query(BasketballPlayer).filter_by(
-                team_id=team.id,
-                name=player_name,
-                season=season
-            ).first()
-            
-            if not player:
-                # Create new player
-                player = BasketballPlayer(
-                    team_id=team.id,
-                    name=player_name,
-                    position=position,
-                    season=season
-                )
-                session.add(player)
-                session.flush()
-                players_created += 1
-            
-            # Check if stats exist
-            existing_stat = session.query(BasketballPerformanceStat).filter_by(
-                player_id=player.id,
-                season=season
-            ).first()
-            
-            # Prepare stat data - using correct field names from model
-            # Extract nested dict values safely
-            field_goals = stat_record.get('fieldGoals', {}) or {}
-            three_pts = stat_record.get('threePointFieldGoals', {}) or {}
-            free_throws = stat_record.get('freeThrows', {}) or {}
-            rebounds = stat_record.get('rebounds', {}) or {}
-            win_shares = stat_record.get('winShares', {}) or {}
-            
-            stat_data = {
-                'player_id': player.id,
-                'season': season,
-                'games_played': stat_record.get('games', 0),
-                'games_started': stat_record.get('starts', 0),
-                'minutes': float(stat_record.get('minutes') or 0.0),
-                'pts': float(stat_record.get('points') or 0.0),
-                'reb': float(rebounds.get('total', 0.0)) if isinstance(rebounds, dict) else 0.0,
-                'oreb': float(rebounds.get('offensive', 0.0)) if isinstance(rebounds, dict) else 0.0,
-                'dreb': float(rebounds.get('defensive', 0.0)) if isinstance(rebounds, dict) else 0.0,
-                'ast': float(stat_record.get('assists', 0.0)) if stat_record.get('assists') else 0.0,
-                'stl': float(stat_record.get('steals', 0.0)) if stat_record.get('steals') else 0.0,
-                'blk': float(stat_record.get('blocks', 0.0)) if stat_record.get('blocks') else 0.0,
-                'tov': float(stat_record.get('turnovers', 0.0)) if stat_record.get('turnovers') else 0.0,
-                'pf': float(stat_record.get('fouls', 0.0)) if stat_record.get('fouls') else 0.0,
-                # Shooting stats
-                'fgm': float(field_goals.get('made', 0.0)) if isinstance(field_goals, dict) else 0.0,
-                'fga': float(field_goals.get('attempted', 0.0)) if isinstance(field_goals, dict) else 0.0,
-                'fg_pct': float(field_goals.get('pct', 0.0)) if isinstance(field_goals, dict) else 0.0,
-                'tpm': float(three_pts.get('made', 0.0)) if isinstance(three_pts, dict) else 0.0,
-                'tpa': float(three_pts.get('attempted', 0.0)) if isinstance(three_pts, dict) else 0.0,
-                'tp_pct': float(three_pts.get('pct', 0.0)) if isinstance(three_pts, dict) else 0.0,
-                'ftm': float(free_throws.get('made', 0.0)) if isinstance(free_throws, dict) else 0.0,
-                'fta': float(free_throws.get('attempted', 0.0)) if isinstance(free_throws, dict) else 0.0,
-                'ft_pct': float(free_throws.get('pct', 0.0)) if isinstance(free_throws, dict) else 0.0,
-                # Advanced stats
-                'per': float(stat_record.get('per', 0.0)) if stat_record.get('per') else None,
-                'usage_rate': float(stat_record.get('usage', 0.0)) if stat_record.get('usage') else 0.0,
-                'ortg': float(stat_record.get('offensiveRating', 0.0)) if stat_record.get('offensiveRating') else None,
-                'drtg': float(stat_record.get('defensiveRating', 0.0)) if stat_record.get('defensiveRating') else None,
-                'ws': float(win_shares.get('total', 0.0)) if isinstance(win_shares, dict) else None,
-                'bpm': float(stat_record.get('bpm', 0.0)) if stat_record.get('bpm') else None
-            }
-            
-            if existing_stat:
-                # Update existing
-                for key, value in stat_data.items():
-                    if value is not None:
-                        setattr(existing_stat, key, value)
-                stats_updated += 1
-            else:
-                # Create new
-                stat = BasketballPerformanceStat(**stat_data)
-                session.add(stat)
-                stats_added += 1
-            
-            # Commit every 100 records
-            if (stats_added + stats_updated) % 100 == 0:
-                session.commit()
-                print(f"  Progress: {i}/{len(stats_data)} - {stats_added} added, {stats_updated} updated, {players_created} new players...")
-        
-        except Exception as e:
-            print(f"  [WARNING] Failed to process {player_name if 'player_name' in locals() else 'player'}: {e}")
-            stats_failed += 1
+
+        if pending_stats:
+            write_stat_batch(session, stat_upsert, pending_stats, new_players, players_by_key)
+
+        if not i:
+            print(f"[WARNING] No stats data for {season} season")
             session.rollback()
-            continue
-    
-    # Final commit for this season
-    session.commit()
-    
+            return None
+
+        session.commit()
+
+    except SQLAlchemyError as e:
+        print(f"[ERROR] {season} season rolled back: {e}")
+        session.rollback()
+        return None
+
     print()
     print(f"[SUCCESS] {season} Season Complete:")
+    print(f"  Records received: {i}")
     print(f"  Players created: {players_created}")
     print(f"  Stats added: {stats_added}")
     print(f"  Stats updated: {stats_updated}")
     print(f"  Stats failed: {stats_failed}")
     print()
-    
-    total_stats_added += stats_added
-    total_stats_updated += stats_updated
-    total_players_created += players_created
-
-# Close session
-session.close()
-
-print("="*80)
-print("BASKETBALL DATA COLLECTION COMPLETE")
-print("="*80)
-print()
-print(f"TOTAL ACROSS ALL SEASONS:")
-print(f"  Seasons collected: {len(seasons)}")
-print(f"  Players created: {total_players_created}")
-print(f"  Stats added: {total_stats_added}")
-print(f"  Stats updated: {total_stats_updated}")
-print(f"  Total stats: {total_stats_added + total_stats_updated}")
-print()
-print("Next steps:")
-print("  1. Build basketball performance calculator")
-print("  2. Build basketball WAR system")
-print("  3. Run valuations")
-print("  4. View in dashboard")
 
+    return {
+        'season': season,
+        'records': i,
+        'players_created': players_created,
+        'stats_added': stats_added,
+        'stats_updated': stats_updated,
+        'stats_failed': stats_failed,
+    }
+
+
+def fetch_seasons(seasons, api, queue, stop):
+    """
+    Stream each season's records into queue, closing each with SEASON_END
+
+    A failed fetch puts its exception in place of SEASON_END and moves on to
+    the next season. Returns early once stop is set.
+    """
+    def put(item):
+        while not stop.is_set():
+            try:
+                queue.put(item, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    for season in seasons:
+        try:
+            for record in api.iter_player_season_stats(season):
+                if not put(record):
+                    return
+            end = SEASON_END
+        except Exception as e:
+            end = e
+        if not put(end):
+            return
+
+
+def season_records(queue):
+    """Yield one season's records from the prefetch queue, raising if its fetch failed"""
+    while True:
+        item = queue.get()
+        if item is SEASON_END:
+            return
+        if isinstance(item, Exception):
+            raise item
+        yield item
+
+
+def collect_seasons(seasons, api, session):
+    """
+    Collect several seasons, streaming them from the API ahead of the writer
+
+    A background thread fetches the seasons in order into a bounded queue, so
+    the next pages download while the current ones are written and at most
+    PREFETCH_RECORDS records wait in memory. Seasons are written one at a
+    time through the shared session, since SQLite allows a single writer.
+
+    Yields:
+        (season, summary) pairs in the order given; summary is None on failure
+    """
+    # Raises before anything is fetched if the upsert's conflict target is missing
+    ensure_stat_upsert_index(session.get_bind())
+
+    queue = Queue(maxsize=PREFETCH_RECORDS)
+    stop = Event()
+    fetcher = Thread(target=fetch_seasons, args=(seasons, api, queue, stop), daemon=True)
+    fetcher.start()
+    try:
+        for season in seasons:
+            records = season_records(queue)
+            try:
+                summary = collect_season(season, api, session, records)
+            except Exception as e:
+                print(f"[ERROR] Failed to fetch {season} season: {e}")
+                session.rollback()
+                summary = None
+
+            # Discard anything the writer left unread so the next season starts clean
+            try:
+                for _ in records:
+                    pass
+            except Exception:
+                pass
+
+            yield season, summary
+    finally:
+        stop.set()
+
+
+def main():
+    print("="*80)
+    print("BASKETBALL DATA COLLECTION")
+    print("="*80)
+    print()
+
+    # Parse arguments
+    parser = argparse.ArgumentParser(description='Collect basketball player statistics')
+    parser.add_argument('--season', type=int, nargs='+', default=[2023],
+                        help='Season years to collect (e.g., --season 2023 2022 2021)')
+    parser.add_argument('--all', action='store_true',
+                        help='Collect last 3 seasons (2023, 2022, 2021)')
+    args = parser.parse_args()
+
+    # Determine seasons to collect
+    if args.all:
+        seasons = [2023, 2022, 2021]
+    else:
+        seasons = args.season
+
+    print(f"Collecting data for seasons: {', '.join(map(str, seasons))}")
+    print()
+
+    # Load config
+    config = get_config()
+
+    api_key = config.cbb_api_key
+
+    if not api_key:
+        print("[ERROR] No basketball API key in config")
+        sys.exit(1)
+
+    # Create API client
+    api = CollegeBasketballDataAPI(api_key=api_key)
+    session = get_session(expire_on_commit=False)
+
+    # Statistics tracking
+    total_stats_added = 0
+    total_stats_updated = 0
+    total_players_created = 0
+
+    # Process each season
+    for season, summary in collect_seasons(seasons, api, session):
+        if not summary:
+            continue
+
+        total_stats_added += summary['stats_added']
+        total_stats_updated += summary['stats_updated']
+        total_players_created += summary['players_created']
+
+    # Close session
+    session.close()
+
+    print("="*80)
+    print("BASKETBALL DATA COLLECTION COMPLETE")
+    print("="*80)
+    print()
+    print(f"TOTAL ACROSS ALL SEASONS:")
+    print(f"  Seasons collected: {len(seasons)}")
+    print(f"  Players created: {total_players_created}")
+    print(f"  Stats added: {total_stats_added}")
+    print(f"  Stats updated: {total_stats_updated}")
+    print(f"  Total stats: {total_stats_added + total_stats_updated}")
+    print()
+    print("Next steps:")
+    print("  1. Build basketball performance calculator")
+    print("  2. Build basketball WAR system")
+    print("  3. Run valuations")
+    print("  4. View in dashboard")
+
+
+if __name__ == '__main__':
+    main()
@@ -53,26 +53,22 @@ if args.sport in ['basketball', 'both']:
     print("\n\nBASKETBALL DATA COLLECTION")
     print("-" * 60)
     
-    # Use the existing basketball collection script
-    import subprocess
-    for year in seasons:
-        print(f"\n[BASKETBALL {year}]")
-        try:
-            result = subprocess.run(
-                ['python', 'collect_basketball_stats.py', '--season', str(year)],
-                capture_output=True,
-                text=True
-            )
-            if result.returncode == 0:
-                # Parse output for success message
-                if 'Season Complete' in result.stdout:
-                    print(f"✓ {year}: Collection successful")
-                else:
-                    print(f"✓ {year}: Completed (check logs for details)")
+    # Seasons stream in order from one background fetch thread through a bounded queue
+    from database import get_session
+    from scrapers.cbb_api_client import CollegeBasketballDataAPI
+    from collect_basketball_stats import collect_seasons
+
+    api = CollegeBasketballDataAPI(api_key=config.cbb_api_key)
+    session = get_session(expire_on_commit=False)
+    try:
+        for year, summary in collect_seasons(seasons, api, session):
+            print(f"\n[BASKETBALL {year}]")
+            if summary:
+                print(f"✓ {year}: Collection successful")
             else:
                 print(f"✗ {year}: Error")
-        except Exception as e:
-            print(f"✗ {year}: Error - {e}")
+    finally:
+        session.close()
     
     print("\n" + "="*60)
     print("BASKETBALL COLLECTION COMPLETE")
@@ -63,26 +63,23 @@ if args.sport == 'football':
 
 elif args.sport == 'basketball':
     print("Basketball multi-season collection...")
-    print("Using existing collect_basketball_stats.py for each season")
-    
-    import subprocess
-    for year in seasons:
-        print(f"\n[BASKETBALL {year}]")
-        try:
-            result = subprocess.run(
-                ['python', 'collect_basketball_stats.py', '--season', str(year)],
-                capture_output=True,
-                text=True,
-                timeout=600
-            )
-            if result.returncode == 0:
+    print("Fetching seasons in order on one background thread (bounded queue), saving as records arrive")
+
+    from database import get_session
+    from scrapers.cbb_api_client import CollegeBasketballDataAPI
+    from collect_basketball_stats import collect_seasons
+
+    api = CollegeBasketballDataAPI(api_key=config.cbb_api_key)
+    session = get_session(expire_on_commit=False)
+    try:
+        for year, summary in collect_seasons(seasons, api, session):
+            print(f"\n[BASKETBALL {year}]")
+            if summary:
                 print(f"✓ {year}: Collection complete")
             else:
                 print(f"✗ {year}: Error (see logs)")
-        except subprocess.TimeoutExpired:
-            print(f"✗ {year}: Timeout")
-        except Exception as e:
-            print(f"✗ {year}: {e}")
+    finally:
+        session.close()
 
 print("\n" + "="*80)
 print("MULTI-SEASON COLLECTION COMPLETE")
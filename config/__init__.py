@@ -3,9 +3,23 @@ Configuration management for CAV Model
 """
 
 import yaml
+from functools import lru_cache
 from pathlib import Path
 from typing import Dict, Any
 
+# libyaml's C loader when available, pure-Python otherwise
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+
+@lru_cache(maxsize=4)
+def _load_from_disk(path: str, mtime_ns: int) -> Dict[str, Any]:
+    """Parse a config file; the mtime key re-parses it only after it changes"""
+    with open(path, 'rb') as f:
+        return yaml.load(f, Loader=SafeLoader)
+
 
 class Config:
     """Configuration loader and manager"""
@@ -25,8 +39,7 @@ class Config:
                 f"Please copy config.template.yaml to config.yaml and add your API keys."
             )
         
-        with open(self.config_path, 'r') as f:
-            return yaml.safe_load(f)
+        return _load_from_disk(str(self.config_path), self.config_path.stat().st_mtime_ns)
     
     def get(self, key: str, default=None) -> Any:
         """Get configuration value by dot-notation key"""
@@ -51,6 +64,11 @@ class Config:
         """Get College Football Data API base URL"""
         return self.get('collegefootballdata.base_url')
     
+    @property
+    def cbb_api_key(self) -> str:
+        """Get College Basketball Data API key"""
+        return self.get('collegebasketballdata.api_key', '')
+    
     @property
     def db_type(self) -> str:
         """Get database type"""
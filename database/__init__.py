@@ -3,9 +3,9 @@ Database models and connection management for CAV Model
 """
 
 from pathlib import Path
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, inspect
 from sqlalchemy.orm import sessionmaker, declarative_base
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import QueuePool
 import sys
 
 # Add project root to path
@@ -22,6 +22,16 @@ _SessionLocal = None
 _engine = None
 
 
+def _set_sqlite_pragmas(dbapi_conn, connection_record):
+    """Use WAL journaling and relaxed syncing for faster commits"""
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-65536")
+    cursor.close()
+
+
 def get_engine():
     """Get or create database engine"""
     global _engine
@@ -38,9 +48,12 @@ def get_engine():
             _engine = create_engine(
                 database_url,
                 connect_args={"check_same_thread": False},
-                poolclass=StaticPool,
+                poolclass=QueuePool,
+                pool_size=5,
+                max_overflow=10,
                 echo=False
             )
+            event.listen(_engine, "connect", _set_sqlite_pragmas)
         elif db_type == 'postgresql':
             host = config.get('database.postgresql.host')
             port = config.get('database.postgresql.port')
@@ -49,7 +62,19 @@ def get_engine():
             password = config.get('database.postgresql.password')
             
             database_url = f"postgresql://{user}:{password}@{host}:{port}/{database}"
-            _engine = create_engine(database_url, echo=False)
+            # Shared by concurrent collectors; validate and recycle so idle
+            # connections dropped by the server are not handed out
+            _engine = create_engine(
+                database_url,
+                pool_size=8,
+                max_overflow=4,
+                pool_pre_ping=True,
+                pool_recycle=1800,
+                # INSERTs already use multi-row VALUES; also page executemany
+                # UPDATEs (bulk updates by primary key) through execute_batch
+                executemany_mode='values_plus_batch',
+                echo=False
+            )
         else:
             raise ValueError(f"Unsupported database type: {db_type}")
     
@@ -67,10 +92,16 @@ def get_session_maker():
     return _SessionLocal
 
 
-def get_session():
-    """Get a new database session"""
+def get_session(**kwargs):
+    """
+    Get a new database session
+    
+    Keyword arguments override the session maker defaults, e.g. bulk
+    collectors pass expire_on_commit=False so committed rows are not
+    reloaded on next access.
+    """
     SessionLocal = get_session_maker()
-    return SessionLocal()
+    return SessionLocal(**kwargs)
 
 
 def init_database():
@@ -82,9 +113,40 @@ def init_database():
     
     engine = get_engine()
     Base.metadata.create_all(bind=engine)
+    create_missing_indexes(engine)
     print(f"✓ Database initialized at: {get_config().db_path}")
 
 
+def create_missing_indexes(engine=None, required=()):
+    """
+    Create model indexes on tables that already exist
+    
+    create_all() skips existing tables entirely, so indexes added to a model
+    after its table was created are never built. This is the one-shot
+    equivalent of CREATE INDEX IF NOT EXISTS for every declared index.
+    
+    Args:
+        engine: Engine to use (defaults to the shared engine)
+        required: Names of indexes the caller depends on, e.g. an upsert's
+            ON CONFLICT target; failing to build one of these raises
+            instead of printing a warning
+    """
+    engine = engine or get_engine()
+    existing_tables = set(inspect(engine).get_table_names())
+    
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            continue
+        for index in table.indexes:
+            try:
+                index.create(bind=engine, checkfirst=True)
+            except Exception as e:
+                if index.name in required:
+                    raise RuntimeError(f"Could not create required index {index.name}: {e}") from e
+                # e.g. a unique index over rows that are already duplicated
+                print(f"[WARNING] Could not create index {index.name}: {e}")
+
+
 def close_connections():
     """Close all database connections"""
     global _engine, _SessionLocal
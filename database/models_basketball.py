@@ -2,7 +2,7 @@
 Basketball-specific database models
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -57,6 +57,11 @@ class BasketballPlayer(Base):
     team = relationship("BasketballTeam", back_populates="players")
     stats = relationship("BasketballPerformanceStat", back_populates="player")
     
+    # Natural key used by the collectors to find existing players
+    __table_args__ = (
+        Index('ix_bbplayer_team_name_season', 'team_id', 'name', 'season', unique=True),
+    )
+    
     def __repr__(self):
         return f"<BasketballPlayer(name='{self.name}', position='{self.position}')>"
 
@@ -122,8 +127,8 @@ class BasketballPerformanceStat(Base):
     
     # Unique constraint
     __table_args__ = (
-        # One stat record per player per season
-        # UniqueConstraint('player_id', 'season', name='unique_player_season'),
+        # One stat record per player per season (also the upsert conflict target)
+        Index('ix_bbstat_season_player', 'season', 'player_id', unique=True),
     )
     
     def __repr__(self):
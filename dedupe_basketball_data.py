@@ -0,0 +1,51 @@
+"""
+Dedupe Basketball Data
+Merge duplicate basketball players and stat rows, then build the unique indexes
+the stat upsert needs. Run once on databases created before those indexes.
+"""
+
+import sys
+from pathlib import Path
+import argparse
+
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from database import get_engine, create_missing_indexes
+from etl.basketball_pipeline import (
+    STAT_UPSERT_INDEX, count_duplicate_basketball_rows, dedupe_basketball_rows
+)
+
+print("="*80)
+print("BASKETBALL DUPLICATE CLEANUP")
+print("="*80)
+print()
+
+# Parse arguments
+parser = argparse.ArgumentParser(description='Merge duplicate basketball rows and build unique indexes')
+parser.add_argument('--dry-run', action='store_true', help='Report duplicates without changing anything')
+args = parser.parse_args()
+
+engine = get_engine()
+
+duplicate_players, duplicate_stats = count_duplicate_basketball_rows(engine)
+print(f"Duplicate players:   {duplicate_players}")
+print(f"Duplicate stat rows: {duplicate_stats}")
+print()
+
+if args.dry_run:
+    print("[DRY RUN] No changes made")
+    sys.exit(0)
+
+if duplicate_players or duplicate_stats:
+    players_merged, stats_removed = dedupe_basketball_rows(engine)
+    print(f"[OK] Merged {players_merged} duplicate players")
+    print(f"[OK] Removed {stats_removed} duplicate stat rows")
+
+try:
+    create_missing_indexes(engine, required=(STAT_UPSERT_INDEX,))
+except RuntimeError as e:
+    print(f"[ERROR] {e}")
+    sys.exit(1)
+
+print(f"[OK] Unique index {STAT_UPSERT_INDEX} is in place")
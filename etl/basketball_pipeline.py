@@ -8,76 +8,183 @@ from pathlib import Path
 from typing import List, Dict, Any
 from datetime import datetime
 import logging
+from sqlalchemy import select, func, inspect, update, delete, bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from database import get_session
+from database import get_session, create_missing_indexes
 from database.models_basketball import (
     BasketballTeam, BasketballPlayer, BasketballPerformanceStat, BasketballTransfer
 )
 from scrapers.cbb_api_client import CollegeBasketballDataAPI
+from etl.transformers import transform_basketball_stat_data
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows per executemany() when upserting stats
+UPSERT_BATCH_SIZE = 500
+
+# Unique index build_stat_upsert() names as its ON CONFLICT target
+STAT_UPSERT_INDEX = 'ix_bbstat_season_player'
+
+
+def build_stat_upsert(dialect_name: str):
+    """
+    INSERT ... ON CONFLICT (player_id, season) DO UPDATE for BasketballPerformanceStat rows
+    
+    Values the API leaves empty keep what is already stored.
+    
+    Args:
+        dialect_name: Engine dialect, 'sqlite' or 'postgresql'
+    """
+    dialect = sqlite if dialect_name == 'sqlite' else postgresql
+    table = BasketballPerformanceStat.__table__
+    stmt = dialect.insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=['player_id', 'season'],
+        set_={
+            column.name: func.coalesce(stmt.excluded[column.name], column)
+            for column in table.c
+            if column.name not in ('id', 'player_id', 'season', 'created_at')
+        }
+    )
+
+
+def count_duplicate_basketball_rows(engine) -> tuple:
+    """
+    Count surplus basketball players and stat rows that block the unique indexes
+    
+    Returns:
+        (duplicate_players, duplicate_stats) - rows beyond the first per natural key
+    """
+    player = BasketballPlayer.__table__
+    stat = BasketballPerformanceStat.__table__
+    
+    def surplus(conn, query):
+        groups = query.having(func.count() > 1).subquery()
+        return conn.execute(select(func.coalesce(func.sum(groups.c.n - 1), 0))).scalar()
+    
+    with engine.connect() as conn:
+        duplicate_players = surplus(conn, (
+            select(func.count().label('n'))
+            .select_from(player)
+            .where(player.c.team_id.is_not(None))
+            .group_by(player.c.team_id, player.c.name, player.c.season)
+        ))
+        duplicate_stats = surplus(conn, (
+            select(func.count().label('n'))
+            .select_from(stat)
+            .group_by(stat.c.season, stat.c.player_id)
+        ))
+    
+    return (duplicate_players, duplicate_stats)
+
+
+def dedupe_basketball_rows(engine) -> tuple:
+    """
+    Merge duplicate basketball players and stat rows so the unique indexes can be built
+    
+    Deletes rows, so it only runs from dedupe_basketball_data.py, never as
+    part of a collection run.
+    
+    Players repeated under one (team_id, name, season) keep the lowest id and
+    their stat rows move to it; stat rows repeated under one (season,
+    player_id) keep the most recently inserted row.
+    
+    Returns:
+        (players_merged, stats_removed)
+    """
+    player = BasketballPlayer.__table__
+    stat = BasketballPerformanceStat.__table__
+    
+    with engine.begin() as conn:
+        kept = (
+            select(func.min(player.c.id).label('kept_id'), player.c.team_id, player.c.name, player.c.season)
+            .where(player.c.team_id.is_not(None))
+            .group_by(player.c.team_id, player.c.name, player.c.season)
+            .having(func.count() > 1)
+            .subquery()
+        )
+        merges = conn.execute(
+            select(player.c.id, kept.c.kept_id)
+            .join(kept, (player.c.team_id == kept.c.team_id)
+                  & (player.c.name == kept.c.name)
+                  & (player.c.season == kept.c.season))
+            .where(player.c.id != kept.c.kept_id)
+        ).all()
+        
+        if merges:
+            conn.execute(
+                update(stat).where(stat.c.player_id == bindparam('dup_id')).values(player_id=bindparam('kept_id')),
+                [{'dup_id': dup_id, 'kept_id': kept_id} for dup_id, kept_id in merges]
+            )
+            conn.execute(delete(player).where(player.c.id.in_([dup_id for dup_id, _ in merges])))
+        
+        latest = select(func.max(stat.c.id)).group_by(stat.c.season, stat.c.player_id)
+        stats_removed = conn.execute(delete(stat).where(stat.c.id.not_in(latest))).rowcount
+    
+    return (len(merges), stats_removed)
+
+
+def ensure_stat_upsert_index(engine):
+    """
+    Make sure the ON CONFLICT target of build_stat_upsert() exists
+    
+    Databases created before the unique indexes were declared do not have
+    them. The index is built here when the data allows it; duplicate rows
+    are never removed implicitly. Raises if duplicates block the build or
+    the conflict target cannot be created, since every stat upsert would
+    otherwise fail.
+    """
+    inspector = inspect(engine)
+    table_name = BasketballPerformanceStat.__tablename__
+    if not inspector.has_table(table_name):
+        return
+    if STAT_UPSERT_INDEX in {index['name'] for index in inspector.get_indexes(table_name)}:
+        return
+    
+    duplicate_players, duplicate_stats = count_duplicate_basketball_rows(engine)
+    if duplicate_players or duplicate_stats:
+        raise RuntimeError(
+            f"Cannot create unique index {STAT_UPSERT_INDEX}: the database holds "
+            f"{duplicate_players} duplicate players and {duplicate_stats} duplicate stat rows. "
+            f"Review them with 'python dedupe_basketball_data.py --dry-run', then merge "
+            f"them with 'python dedupe_basketball_data.py'."
+        )
+    create_missing_indexes(engine, required=(STAT_UPSERT_INDEX,))
+
 
 class BasketballDataPipeline:
     """ETL pipeline for basketball data"""
     
     def __init__(self, api_client: CollegeBasketballDataAPI):
         self.api = api_client
-        self.session = get_session()
+        # Objects stay usable after each team's commit (players are cached per season)
+        self.session = get_session(expire_on_commit=False)
     
     def transform_player_data(self, player_data: Dict, team_id: int, year: int) -> Dict:
         """Transform raw API player data to database format"""
         return {
             'team_id': team_id,
             'name': player_data.get('name', ''),
-            'jersey': player_data.get('jersey', player_data.get('number')),
+            'jersey_number': player_data.get('jersey', player_data.get('number')),
             'position': player_data.get('position', ''),
             'height': player_data.get('height'),
             'weight': player_data.get('weight'),
-            'year_str': player_data.get('year', player_data.get('class')),
+            'class_year': player_data.get('year', player_data.get('class')),
             'hometown': player_data.get('hometown'),
             'state': player_data.get('state'),
-            'high_school': player_data.get('high_school'),
             'season': year
         }
     
     def transform_stat_data(self, stat_data: Dict, player_id: int, year: int) -> Dict:
         """Transform raw API stat data to database format"""
-        return {
-            'player_id': player_id,
-            'season': year,
-            'games_played': stat_data.get('games', stat_data.get('gp', 0)),
-            'games_started': stat_data.get('games_started', stat_data.get('gs', 0)),
-            'minutes_per_game': stat_data.get('minutes', stat_data.get('mpg', 0.0)),
-            'points': stat_data.get('points', stat_data.get('pts', 0.0)),
-            'rebounds': stat_data.get('rebounds', stat_data.get('reb', 0.0)),
-            'assists': stat_data.get('assists', stat_data.get('ast', 0.0)),
-            'steals': stat_data.get('steals', stat_data.get('stl', 0.0)),
-            'blocks': stat_data.get('blocks', stat_data.get('blk', 0.0)),
-            'turnovers': stat_data.get('turnovers', stat_data.get('tov', 0.0)),
-            'personal_fouls': stat_data.get('fouls', stat_data.get('pf', 0.0)),
-            'fg_made': stat_data.get('fgm', 0.0),
-            'fg_attempts': stat_data.get('fga', 0.0),
-            'fg_pct': stat_data.get('fg_pct', 0.0),
-            'three_pt_made': stat_data.get('three_pm', stat_data.get('3pm', 0.0)),
-            'three_pt_attempts': stat_data.get('three_pa', stat_data.get('3pa', 0.0)),
-            'three_pt_pct': stat_data.get('three_pct', stat_data.get('3p_pct', 0.0)),
-            'ft_made': stat_data.get('ftm', 0.0),
-            'ft_attempts': stat_data.get('fta', 0.0),
-            'ft_pct': stat_data.get('ft_pct', 0.0),
-            # Advanced stats (if available)
-            'per': stat_data.get('per'),
-            'usage_rate': stat_data.get('usage_rate', stat_data.get('usg', 0.0)),
-            'offensive_rating': stat_data.get('offensive_rating', stat_data.get('ortg')),
-            'defensive_rating': stat_data.get('defensive_rating', stat_data.get('drtg')),
-            'ws': stat_data.get('ws'),
-            'bpm': stat_data.get('bpm')
-        }
+        return transform_basketball_stat_data(stat_data, player_id, year)
     
     def collect_rosters(self, year: int, limit: int = None) -> tuple:
         """Collect rosters for all teams"""
@@ -87,6 +194,14 @@ class BasketballDataPipeline:
         if limit:
             teams = teams[:limit]
         
+        # Season players by (team_id, name), kept current as players are added
+        players_by_key = {
+            (player.team_id, player.name): player
+            for player in self.session.scalars(
+                select(BasketballPlayer).where(BasketballPlayer.season == year)
+            )
+        }
+        
         total_teams = len(teams)
         players_added = 0
         players_updated = 0
@@ -113,11 +228,7 @@ class BasketballDataPipeline:
                         if not player_name:
                             continue
                         
-                        existing = self.session.query(BasketballPlayer).filter_by(
-                            team_id=team.id,
-                            name=player_name,
-                            season=year
-                        ).first()
+                        existing = players_by_key.get((team.id, player_name))
                         
                         if existing:
                             # Update existing player
@@ -129,6 +240,7 @@ class BasketballDataPipeline:
                             # Create new player
                             player = BasketballPlayer(**self.transform_player_data(player_data, team.id, year))
                             self.session.add(player)
+                            players_by_key[(team.id, player_name)] = player
                             players_added += 1
                         
                         team_players += 1
@@ -145,6 +257,12 @@ class BasketballDataPipeline:
                 logger.error(f"    Failed to process {team.school}: {e}")
                 self.session.rollback()
                 teams_failed += 1
+                
+                # Drop this team's rolled-back players from the cache
+                players_by_key = {
+                    key: player for key, player in players_by_key.items()
+                    if inspect(player).persistent
+                }
                 continue
         
         logger.info(f"\nRoster collection complete:")
@@ -159,6 +277,9 @@ class BasketballDataPipeline:
         """Collect player statistics"""
         logger.info(f"Collecting basketball player stats for {year} season...")
         
+        # Raises before anything is fetched if the upsert's conflict target is missing
+        ensure_stat_upsert_index(self.session.get_bind())
+        
         # Get all stats from API
         stats_data = self.api.get_player_season_stats(year=year)
         
@@ -172,7 +293,24 @@ class BasketballDataPipeline:
         stats_updated = 0
         stats_failed = 0
         
-        # Process each stat record
+        # Player ids for the season by (school, name), and players that already have stats
+        player_ids = {
+            (school, name): player_id
+            for player_id, school, name in self.session.execute(
+                select(BasketballPlayer.id, BasketballTeam.school, BasketballPlayer.name)
+                .join(BasketballTeam)
+                .where(BasketballPlayer.season == year)
+            )
+        }
+        existing_stats = set(self.session.scalars(
+            select(BasketballPerformanceStat.player_id)
+            .where(BasketballPerformanceStat.season == year)
+        ))
+        
+        # Build all rows in memory by player; the database picks insert vs update per row.
+        # The API can repeat a player, and one multi-row ON CONFLICT statement may not
+        # touch the same row twice (PostgreSQL), so the last record per player wins
+        stat_rows = {}
         for stat_record in stats_data:
             try:
                 player_name = stat_record.get('player', stat_record.get('name'))
@@ -183,48 +321,38 @@ class BasketballDataPipeline:
                     continue
                 
                 # Find the player in our database
-                player = self.session.query(BasketballPlayer).join(BasketballTeam).filter(
-                    BasketballPlayer.name == player_name,
-                    BasketballTeam.school == team_name,
-                    BasketballPlayer.season == year
-                ).first()
+                player_id = player_ids.get((team_name, player_name))
                 
-                if not player:
+                if not player_id:
                     # Player not in database yet
                     stats_failed += 1
                     continue
                 
-                # Check if stats exist
-                existing = self.session.query(BasketballPerformanceStat).filter_by(
-                    player_id=player.id,
-                    season=year
-                ).first()
-                
-                if existing:
-                    # Update
-                    for key, value in self.transform_stat_data(stat_record, player.id, year).items():
-                        if value is not None:
-                            setattr(existing, key, value)
+                repeated = player_id in stat_rows
+                stat_rows[player_id] = self.transform_stat_data(stat_record, player_id, year)
+                if repeated:
+                    continue
+                if player_id in existing_stats:
                     stats_updated += 1
                 else:
-                    # Create new
-                    stat = BasketballPerformanceStat(**self.transform_stat_data(stat_record, player.id, year))
-                    self.session.add(stat)
                     stats_added += 1
-                
-                # Commit every 100 records
-                if (stats_added + stats_updated) % 100 == 0:
-                    self.session.commit()
-                    logger.info(f"    Progress: {stats_added} added, {stats_updated} updated...")
             
-            except Exception as e:
+            except (TypeError, ValueError) as e:
                 logger.warning(f"    Failed to process stat: {e}")
                 stats_failed += 1
-                self.session.rollback()
                 continue
         
-        # Final commit
-        self.session.commit()
+        stat_rows = list(stat_rows.values())
+        try:
+            stat_upsert = build_stat_upsert(self.session.get_bind().dialect.name)
+            for start in range(0, len(stat_rows), UPSERT_BATCH_SIZE):
+                self.session.execute(stat_upsert, stat_rows[start:start + UPSERT_BATCH_SIZE])
+                logger.info(f"    Progress: {min(start + UPSERT_BATCH_SIZE, len(stat_rows))}/{len(stat_rows)} rows written...")
+            self.session.commit()
+        except SQLAlchemyError as e:
+            logger.error(f"Failed to save stats: {e}")
+            self.session.rollback()
+            return (0, 0)
         
         logger.info(f"\nStats collection complete:")
         logger.info(f"  Stats added: {stats_added}")
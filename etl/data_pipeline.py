@@ -8,6 +8,7 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from pathlib import Path
 import sys
+from sqlalchemy import select, insert
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -64,10 +65,13 @@ class DataPipeline:
         self.session.add(log_entry)
         self.session.commit()
     
-    def collect_teams(self) -> int:
+    def collect_teams(self, limit: int = None) -> int:
         """
         Collect all FBS team data
         
+        Args:
+            limit: Optional cap on the number of teams saved (for quick test runs)
+        
         Returns:
             Number of teams added/updated
         """
@@ -75,6 +79,8 @@ class DataPipeline:
         
         try:
             teams_data = self.cfb_api.get_teams()
+            if limit:
+                teams_data = teams_data[:limit]
             count_added = 0
             count_updated = 0
             
@@ -205,6 +211,25 @@ class DataPipeline:
             # Track processed players to avoid duplicates within this run
             processed_players = set()
             
+            # Preload exact-name player ids and the season's stat rows once
+            # (the lowest id wins, as with the .first() lookups they replace)
+            player_ids_by_name = {}
+            for player_id, name in self.session.execute(
+                select(Player.id, Player.name).order_by(Player.id)
+            ):
+                player_ids_by_name.setdefault(name, player_id)
+            
+            existing_stats = {}
+            for stat in self.session.scalars(
+                select(PerformanceStat)
+                .where(PerformanceStat.season == year)
+                .order_by(PerformanceStat.id)
+            ):
+                existing_stats.setdefault(stat.player_id, stat)
+            
+            # New stat rows, bulk inserted with one executemany before the commit
+            new_stat_rows = []
+            
             # Process each player's aggregated stats
             for player_stats in aggregated_players:
                 player_name = player_stats.get('player')
@@ -216,46 +241,44 @@ class DataPipeline:
                 
                 # Find player in database
                 # Try exact match first, then fuzzy
-                player = self.session.query(Player).filter(
-                    Player.name == player_name
-                ).first()
+                player_id = player_ids_by_name.get(player_name)
                 
-                if not player:
+                if not player_id:
                     # Try fuzzy match
                     player = self.session.query(Player).filter(
                         Player.name.ilike(f"%{player_name}%")
                     ).first()
-                
-                if not player:
-                    # Try matching by team as well
-                    if team:
-                        team_obj = self.session.query(Team).filter(
-                            Team.name.ilike(f"%{team}%")
-                        ).first()
-                        
-                        if team_obj:
-                            player = self.session.query(Player).filter(
-                                Player.name.ilike(f"%{player_name}%"),
-                                Player.current_team_id == team_obj.id
+                    
+                    if not player:
+                        # Try matching by team as well
+                        if team:
+                            team_obj = self.session.query(Team).filter(
+                                Team.name.ilike(f"%{team}%")
                             ).first()
+                            
+                            if team_obj:
+                                player = self.session.query(Player).filter(
+                                    Player.name.ilike(f"%{player_name}%"),
+                                    Player.current_team_id == team_obj.id
+                                ).first()
+                    
+                    if player:
+                        player_id = player.id
                 
-                if not player:
+                if not player_id:
                     logger.debug(f"Player not found: {player_name} ({team})")
                     count_failed += 1
                     continue
                 
                 # Skip if we've already processed this player in this run
-                if player.id in processed_players:
+                if player_id in processed_players:
                     count_failed += 1
                     continue
                 
-                processed_players.add(player.id)
+                processed_players.add(player_id)
                 
                 # Check if stat record exists
-                existing_stat = self.session.query(PerformanceStat).filter_by(
-                    player_id=player.id,
-                    season=year
-                ).first()
+                existing_stat = existing_stats.get(player_id)
                 
                 # Check if we have any stats
                 has_stats = any([
@@ -284,28 +307,23 @@ class DataPipeline:
                     count_updated += 1
                 else:
                     # Add new stat record
-                    new_stat = PerformanceStat(
-                        player_id=player.id,
-                        season=year,
-                        team=team,
-                        passing_stats=player_stats.get('passing_stats'),
-                        rushing_stats=player_stats.get('rushing_stats'),
-                        receiving_stats=player_stats.get('receiving_stats'),
-                        defensive_stats=player_stats.get('defensive_stats')
-                    )
-                    self.session.add(new_stat)
+                    new_stat_rows.append({
+                        'player_id': player_id,
+                        'season': year,
+                        'team': team,
+                        'passing_stats': player_stats.get('passing_stats'),
+                        'rushing_stats': player_stats.get('rushing_stats'),
+                        'receiving_stats': player_stats.get('receiving_stats'),
+                        'defensive_stats': player_stats.get('defensive_stats')
+                    })
                     count_added += 1
                 
-                # Commit in batches with error handling
+                # The season is committed once below; a failure rolls back the whole season
                 if (count_added + count_updated) % 100 == 0:
-                    try:
-                        self.session.commit()
-                        logger.info(f"  Progress: {count_added} added, {count_updated} updated...")
-                    except Exception as e:
-                        logger.warning(f"  Batch commit error (likely duplicate), rolling back batch: {e}")
-                        self.session.rollback()
-                        # Continue with next batch
+                    logger.info(f"  Progress: {count_added} added, {count_updated} updated...")
             
+            if new_stat_rows:
+                self.session.execute(insert(PerformanceStat), new_stat_rows)
             self.session.commit()
             logger.info(f"✓ Stats: {count_added} added, {count_updated} updated, {count_failed} failed")
             
@@ -253,6 +253,82 @@ def transform_ppa_stats(ppa_entry: Dict) -> Dict:
     }
 
 
+# Column, API field, key within a nested API object (None for top-level), cast, default
+BASKETBALL_STAT_SCHEMA = [
+    ('games_played', None, 'games', int, 0),
+    ('games_started', None, 'starts', int, 0),
+    ('minutes', None, 'minutes', float, 0.0),
+    ('pts', None, 'points', float, 0.0),
+    ('reb', 'rebounds', 'total', float, 0.0),
+    ('oreb', 'rebounds', 'offensive', float, 0.0),
+    ('dreb', 'rebounds', 'defensive', float, 0.0),
+    ('ast', None, 'assists', float, 0.0),
+    ('stl', None, 'steals', float, 0.0),
+    ('blk', None, 'blocks', float, 0.0),
+    ('tov', None, 'turnovers', float, 0.0),
+    ('pf', None, 'fouls', float, 0.0),
+    # Shooting stats
+    ('fgm', 'fieldGoals', 'made', float, 0.0),
+    ('fga', 'fieldGoals', 'attempted', float, 0.0),
+    ('fg_pct', 'fieldGoals', 'pct', float, 0.0),
+    ('tpm', 'threePointFieldGoals', 'made', float, 0.0),
+    ('tpa', 'threePointFieldGoals', 'attempted', float, 0.0),
+    ('tp_pct', 'threePointFieldGoals', 'pct', float, 0.0),
+    ('ftm', 'freeThrows', 'made', float, 0.0),
+    ('fta', 'freeThrows', 'attempted', float, 0.0),
+    ('ft_pct', 'freeThrows', 'pct', float, 0.0),
+    # Advanced stats
+    ('per', None, 'per', float, None),
+    ('usage_rate', None, 'usage', float, 0.0),
+    ('ortg', None, 'offensiveRating', float, None),
+    ('drtg', None, 'defensiveRating', float, None),
+    ('ws', 'winShares', 'total', float, 0.0),
+    ('bpm', None, 'bpm', float, None),
+]
+
+BASKETBALL_NESTED_FIELDS = sorted({field for _, field, _, _, _ in BASKETBALL_STAT_SCHEMA if field})
+
+# Stored when a nested API field holds something other than an object; columns
+# not listed fall back to their schema default. Win shares stay unknown.
+BASKETBALL_MALFORMED_VALUES = {'ws': None}
+
+
+def _num(d: Dict, key: str, default=0.0, cast=float):
+    """Look up a numeric field once and coerce it, falling back to default when missing"""
+    value = d.get(key)
+    return cast(value) if value is not None and value != '' else default
+
+
+def transform_basketball_stat_data(stat_entry: Dict, player_id: int, season: int) -> Dict:
+    """
+    Transform a basketball player-season stat record to BasketballPerformanceStat format
+    
+    Args:
+        stat_entry: Raw player season stats from the CBB API
+        player_id: Database player ID
+        season: Season year
+    
+    Returns:
+        Transformed stat data
+    """
+    # Type-check nested stat objects once; a missing object reads as empty,
+    # anything else that is not an object is marked None
+    sources = {None: stat_entry}
+    for field in BASKETBALL_NESTED_FIELDS:
+        nested = stat_entry.get(field) or {}
+        sources[field] = nested if isinstance(nested, dict) else None
+    
+    stat_data = {'player_id': player_id, 'season': season}
+    for column, field, key, cast, default in BASKETBALL_STAT_SCHEMA:
+        source = sources[field]
+        if source is None:
+            stat_data[column] = BASKETBALL_MALFORMED_VALUES.get(column, default)
+        else:
+            stat_data[column] = _num(source, key, default, cast)
+    
+    return stat_data
+
+
 def merge_stat_dicts(base_stats: Dict, additional_stats: Dict) -> Dict:
     """
     Merge multiple stat dictionaries, updating base with additional
@@ -2,9 +2,16 @@
 Quick database query script
 """
 
+from sqlalchemy import select, func
 from database import get_session
 from database.models import Player, Team
 
+
+def count_rows(statement):
+    """Run a COUNT query and return the number"""
+    return session.execute(statement).scalar_one()
+
+
 session = get_session()
 
 print("="*70)
@@ -12,11 +19,11 @@ print("DATABASE CONTENTS")
 print("="*70)
 
 # Count teams
-team_count = session.query(Team).count()
+team_count = count_rows(select(func.count()).select_from(Team.__table__))
 print(f"\n✓ Teams: {team_count}")
 
 # Count players
-player_count = session.query(Player).count()
+player_count = count_rows(select(func.count()).select_from(Player.__table__))
 print(f"✓ Players: {player_count}")
 
 # Show sample players by team
@@ -25,10 +32,17 @@ print("Sample Players by Team:")
 print("-"*70)
 
 for team_name in ['Alabama', 'Georgia', 'Ohio State']:
-    team = session.query(Team).filter(Team.name == team_name).first()
-    if team:
-        players = session.query(Player).filter_by(current_team_id=team.id).limit(5).all()
-        print(f"\n{team_name} ({len(session.query(Player).filter_by(current_team_id=team.id).all())} players):")
+    team_id = session.execute(select(Team.id).where(Team.name == team_name)).scalars().first()
+    if team_id:
+        players = session.execute(
+            select(Player.name, Player.position, Player.height, Player.weight, Player.hometown, Player.state)
+            .where(Player.current_team_id == team_id)
+            .limit(5)
+        ).all()
+        team_player_count = count_rows(
+            select(func.count()).select_from(Player.__table__).where(Player.current_team_id == team_id)
+        )
+        print(f"\n{team_name} ({team_player_count} players):")
         for p in players:
             print(f"  • {p.name} - {p.position} - {p.height}in/{p.weight}lbs - {p.hometown}, {p.state}")
 
@@ -36,10 +50,14 @@ for team_name in ['Alabama', 'Georgia', 'Ohio State']:
 print("\n" + "-"*70)
 print("Sample Quarterbacks:")
 print("-"*70)
-qbs = session.query(Player).filter_by(position='QB').limit(10).all()
+qbs = session.execute(
+    select(Player.name, Team.name.label('team_name'), Player.jersey_number)
+    .outerjoin(Team, Team.id == Player.current_team_id)
+    .where(Player.position == 'QB')
+    .limit(10)
+).all()
 for qb in qbs:
-    team = session.query(Team).filter_by(id=qb.current_team_id).first()
-    team_name = team.name if team else "Unknown"
+    team_name = qb.team_name or "Unknown"
     print(f"  • {qb.name} - {team_name} - #{qb.jersey_number}")
 
 print("\n" + "="*70)
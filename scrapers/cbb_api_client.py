@@ -6,7 +6,7 @@ Handles data collection from collegebasketballdata.com
 import requests
 import time
 import logging
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
 from ratelimit import limits, sleep_and_retry
 
@@ -142,6 +142,39 @@ class CollegeBasketballDataAPI:
         
         return []
     
+    def iter_player_season_stats(self, year: int, page_size: int = 500) -> Iterator[Dict]:
+        """
+        Stream player statistics for a season one page at a time
+        
+        Args:
+            year: Season year
+            page_size: Records requested per API call
+            
+        Yields:
+            Player stat dictionaries
+        """
+        logger.info(f"Streaming player stats for {year} season...")
+        
+        offset = 0
+        previous_first = None
+        while True:
+            params = {'season': year, 'limit': page_size, 'offset': offset}
+            data = self._make_request('stats/player/season', params)
+            page = (data if isinstance(data, list) else data.get('stats', [])) if data else []
+            
+            # An API that ignores offset returns the same page forever
+            if page and page[0] == previous_first:
+                logger.warning(f"  Offset {offset} repeated the previous page; stopping")
+                return
+            previous_first = page[0] if page else None
+            
+            yield from page
+            
+            # A short page is the last one; a page that ignores the limit is the full set
+            if len(page) != page_size:
+                return
+            offset += page_size
+    
     def get_all_player_stats(self, year: int) -> Dict[str, List[Dict]]:
         """
         Get all stat categories for a season
@@ -286,7 +319,7 @@ def main():
     project_root = Path(__file__).parent.parent
     sys.path.insert(0, str(project_root))
     
-    import yaml
+    from config import get_config
     
     print("="*80)
     print("COLLEGE BASKETBALL DATA API TEST")
@@ -294,10 +327,7 @@ def main():
     print()
     
     # Load config
-    config_path = project_root / 'config' / 'config.yaml'
-    with open(config_path, 'r', encoding='utf-8') as f:
-        config = yaml.safe_load(f)
-    api_key = config.get('collegebasketballdata', {}).get('api_key', '')
+    api_key = get_config().cbb_api_key
     
     if not api_key:
         print("[ERROR] No API key found in config/config.yaml")
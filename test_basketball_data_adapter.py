@@ -0,0 +1,142 @@
+"""
+Test Suite for Basketball Data Adapter
+Checks the bulk DataFrame path against the per-player adapter on an in-memory database
+"""
+
+import math
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from database.models_basketball import BasketballPlayer, BasketballPerformanceStat, BasketballTeam
+from basketball_data_adapter import (
+    PER_GAME_STATS, COUNT_STATS, adapt_basketball_player_to_valuation_format,
+    adapt_basketball_players_bulk, calculate_per_game_stats, calculate_per_game_stats_batch,
+)
+
+
+def _session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    return sessionmaker(bind=engine)()
+
+
+def _seed(session):
+    """Three player-seasons: a regular starter, a zero-games walk-on, and a teamless player"""
+    team = BasketballTeam(id=1, school='Duke', conference='ACC')
+    session.add(team)
+    session.add_all([
+        BasketballPlayer(id=1, name='Starter', team_id=1, season=2023, position='PG'),
+        BasketballPlayer(id=2, name='Walk-On', team_id=1, season=2023, position=None),
+        BasketballPlayer(id=3, name='Free Agent', team_id=None, season=2023, position='C'),
+    ])
+    session.add_all([
+        BasketballPerformanceStat(
+            player_id=1, season=2023, games_played=31, minutes=1003.0,
+            pts=538, reb=127, ast=191, stl=43, blk=7, tov=88,
+            fg_pct=0.473, per=22.4, ws=5.1,
+        ),
+        BasketballPerformanceStat(player_id=2, season=2023, games_played=0, pts=0, ast=0, tov=0),
+        BasketballPerformanceStat(
+            player_id=3, season=2023, games_played=12, minutes=97.0,
+            pts=41, reb=37, ast=3, stl=1, blk=9, tov=0, per=0,
+        ),
+    ])
+    session.commit()
+
+
+def _scalar_rows(session):
+    """Per-player adapter output keyed by player_id"""
+    rows = {}
+    for stat in session.query(BasketballPerformanceStat):
+        player = session.get(BasketballPlayer, stat.player_id)
+        team = session.get(BasketballTeam, player.team_id) if player.team_id else None
+        data = adapt_basketball_player_to_valuation_format(player, stat, team)
+        rows[player.id] = calculate_per_game_stats(data)
+    return rows
+
+
+def test_bulk_matches_scalar():
+    """Bulk int32/float32 columns give the same per-game values as the scalar path"""
+    print("\n" + "="*80)
+    print("TEST: Bulk Matches Scalar")
+    print("="*80)
+
+    session = _session()
+    _seed(session)
+    scalar = _scalar_rows(session)
+
+    bulk = calculate_per_game_stats_batch(adapt_basketball_players_bulk(session, season=2023))
+    assert len(bulk) == 3
+    for column in COUNT_STATS:
+        assert bulk[column].dtype == np.int32, column
+    assert bulk['per'].dtype == np.float32
+
+    for row in bulk.to_dict('records'):
+        expected = scalar[row['player_id']]
+        for field in ('team', 'position', 'conference', 'games', 'pts', 'tov'):
+            assert row[field] == expected[field], field
+        for field in ('minutes', 'fg_pct', 'per', 'ws'):
+            assert math.isclose(row[field], expected[field], abs_tol=1e-4), field
+        if expected['games']:
+            for field in list(PER_GAME_STATS) + ['ast_tov_ratio']:
+                assert math.isclose(row[field], expected[field], abs_tol=1e-4), (row['name'], field)
+
+    free_agent = bulk.set_index('player_id').loc[3]
+    assert free_agent['team'] == 'Unknown'
+    assert free_agent['per'] == 15.0
+    assert free_agent['ast_tov_ratio'] == float('inf')
+    print("\n[PASS] bulk vs scalar test passed!")
+
+
+def test_zero_games():
+    """Players without games keep NaN per-game stats where the scalar path adds none"""
+    print("\n" + "="*80)
+    print("TEST: Zero Games")
+    print("="*80)
+
+    session = _session()
+    _seed(session)
+    scalar = _scalar_rows(session)
+
+    bulk = calculate_per_game_stats_batch(adapt_basketball_players_bulk(session))
+    walk_on = bulk.set_index('player_id').loc[2]
+
+    assert 'ppg' not in scalar[2]
+    assert walk_on['games'] == 0
+    assert walk_on['position'] == 'SF'
+    for field in list(PER_GAME_STATS) + ['ast_tov_ratio']:
+        assert np.isnan(walk_on[field]), field
+    print("\n[PASS] zero games test passed!")
+
+
+def test_empty_database():
+    """An empty database yields an empty, correctly typed frame"""
+    print("\n" + "="*80)
+    print("TEST: Empty Database")
+    print("="*80)
+
+    session = _session()
+
+    bulk = calculate_per_game_stats_batch(adapt_basketball_players_bulk(session))
+
+    assert bulk.empty
+    assert bulk['pts'].dtype == np.int32
+    assert set(PER_GAME_STATS) <= set(bulk.columns)
+    print("\n[PASS] empty database test passed!")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*80)
+    print("BASKETBALL DATA ADAPTER - TEST SUITE")
+    print("="*80)
+
+    test_bulk_matches_scalar()
+    test_zero_games()
+    test_empty_database()
+
+    print("\n" + "="*80)
+    print("ALL TESTS PASSED! [PASS]")
+    print("="*80)
@@ -0,0 +1,85 @@
+"""
+Test Suite for Basketball API Client
+Pages through player season stats with a stubbed request method
+"""
+
+from scrapers.cbb_api_client import CollegeBasketballDataAPI
+
+
+def _stub_api(responses):
+    """Client whose _make_request answers from responses(params) and records each call"""
+    api = CollegeBasketballDataAPI()
+    api.calls = []
+
+    def make_request(endpoint, params=None):
+        api.calls.append(dict(params))
+        return responses(params)
+
+    api._make_request = make_request
+    return api
+
+
+def _records(start, count):
+    return [{'id': i, 'name': f"Player {i}"} for i in range(start, start + count)]
+
+
+def test_short_page_ends_stream():
+    """Full pages advance the offset; the first short page is the last"""
+    print("\n" + "="*80)
+    print("TEST: Short Page Ends Stream")
+    print("="*80)
+
+    data = _records(0, 7)
+    api = _stub_api(lambda params: data[params['offset']:params['offset'] + params['limit']])
+
+    records = list(api.iter_player_season_stats(2024, page_size=3))
+
+    assert [r['id'] for r in records] == list(range(7))
+    assert [c['offset'] for c in api.calls] == [0, 3, 6]
+    print("\n[PASS] short page test passed!")
+
+
+def test_exact_multiple_and_empty():
+    """An empty page after full ones ends the stream, as does a failed request"""
+    print("\n" + "="*80)
+    print("TEST: Exact Multiple And Empty Responses")
+    print("="*80)
+
+    data = _records(0, 6)
+    api = _stub_api(lambda params: {'stats': data[params['offset']:params['offset'] + params['limit']]})
+    assert len(list(api.iter_player_season_stats(2024, page_size=3))) == 6
+    assert [c['offset'] for c in api.calls] == [0, 3, 6]
+
+    api = _stub_api(lambda params: None)
+    assert list(api.iter_player_season_stats(2024, page_size=3)) == []
+    assert len(api.calls) == 1
+    print("\n[PASS] exact multiple test passed!")
+
+
+def test_ignored_offset_stops():
+    """An API that ignores offset must not loop forever or repeat records"""
+    print("\n" + "="*80)
+    print("TEST: Ignored Offset Stops")
+    print("="*80)
+
+    api = _stub_api(lambda params: _records(0, params['limit']))
+
+    records = list(api.iter_player_season_stats(2024, page_size=3))
+
+    assert [r['id'] for r in records] == [0, 1, 2]
+    assert len(api.calls) == 2
+    print("\n[PASS] ignored offset test passed!")
+
+
+if __name__ == "__main__":
+    print("\n" + "="*80)
+    print("BASKETBALL API CLIENT - TEST SUITE")
+    print("="*80)
+
+    test_short_page_ends_stream()
+    test_exact_multiple_and_empty()
+    test_ignored_offset_stops()
+
+    print("\n" + "="*80)
+    print("ALL TESTS PASSED! [PASS]")
+    print("="*80)